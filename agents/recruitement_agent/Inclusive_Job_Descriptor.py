@@ -16,35 +16,73 @@
 #└──────────────────────────────────────────────────────────────────┘ 
 
 
+import asyncio
+import copy
+import hashlib
 import json
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from ._gemini import ModelCache, compact_prompt, configure, lazy_genai, response_schema
+    from ._jd_cache import CACHE_DIR, SmartCache
+    from ._models import JDOutput
+    from ._retry import retry_transient
+except ImportError:
+    from _gemini import ModelCache, compact_prompt, configure, lazy_genai, response_schema
+    from _jd_cache import CACHE_DIR, SmartCache
+    from _models import JDOutput
+    from _retry import retry_transient
+
+# ==========================================================
+# API KEY AND GEMINI SDK
+# ==========================================================
+
+_ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
+_ENV_LOADED = False
+_API_KEY = None
+
+
+def _ensure_env() -> None:
+    """
+    Loads .env (the agents' own file if present, else the nearest one
+    found by python-dotenv) and resolves GOOGLE_API_KEY, once per process.
+    """
+    global _ENV_LOADED, _API_KEY
+    if _ENV_LOADED:
+        return
+    if _ENV_PATH.exists():
+        load_dotenv(_ENV_PATH)
+    else:
+        load_dotenv()
+    _API_KEY = os.getenv("GOOGLE_API_KEY")
+    _ENV_LOADED = True
 
 # ==========================================================
 # UPDATED SYSTEM PROMPT (FINAL VERSION)
 # ==========================================================
 
-SYSTEM_PROMPT = """
+_RAW_SYSTEM_PROMPT = """
 You are “Scout,” an expert Inclusive Job Description Generator trained to produce 
 professional, market-aligned, bias-free job descriptions in strict JSON format.
 
 Your job is to take the user's JSON input and generate a complete, realistic, 
 2024–2025-standard Job Description.
 
-The JD must be:
-- Clear
-- Inclusive
-- Market-aligned
-- Structured like modern job ads
-- Written in accessible language (Grade 8–10 readability)
-- Free from gender-coded or biased language
-- Formatted EXACTLY as instructed below
+The JD must be clear, inclusive, market-aligned, structured like modern job ads,
+written in accessible language (Grade 8–10 readability), free from gender-coded
+or biased language, and formatted EXACTLY as instructed below.
 
-======================================================================
-INPUT RULES
-======================================================================
+## INPUT RULES
 
 You will receive a JSON object with fields such as:
 role, location, seniority, responsibilities, requirements, brand_tone, kb_context, department.
@@ -53,7 +91,7 @@ RULES:
 1. ROLE is mandatory.
    - If missing → output.status = "needs_clarification"
    - missing_info = ["role"]
-   - job_description = {}
+   - job_description = null
 
 2. All other fields:
    - If empty, null, “don't know”, “add yourself”, or missing:
@@ -63,9 +101,7 @@ RULES:
    - If provided, you may incorporate tone, culture, benefits, mission, etc.
    - But you still must produce a complete JD even without KB.
 
-======================================================================
-JD OUTPUT STRUCTURE (STRICT)
-======================================================================
+## JD OUTPUT STRUCTURE (STRICT)
 
 {
   "status": "ok",
@@ -82,9 +118,7 @@ JD OUTPUT STRUCTURE (STRICT)
   "notes": "Human review required before posting."
 }
 
-======================================================================
-FULL TEXT FORMAT (MUST MATCH THIS TEMPLATE EXACTLY)
-======================================================================
+## FULL TEXT FORMAT (MUST MATCH THIS TEMPLATE EXACTLY)
 
 About the job
 
@@ -127,9 +161,7 @@ Inclusion Statement:
 - Include disability accommodations
 - Avoid all bias (gender, age, cultural, ability)
 
-======================================================================
-MARKET REALISM RULES
-======================================================================
+## MARKET REALISM RULES
 - Responsibilities MUST match the global job market for the role.
 - Requirements MUST match modern tools, frameworks, and expectations.
 - Engineering roles: Python, cloud, containers, CI/CD, LLM tooling (when applicable)
@@ -137,98 +169,380 @@ MARKET REALISM RULES
 - Marketing roles: analytics, campaigns, SEO/SEM, content systems
 - Etc.
 
-======================================================================
-TONE RULES
-======================================================================
+## TONE RULES
 - If brand_tone present, mirror it.
 - If kb_context tone present, align with it.
 - Otherwise: warm, inclusive, professional.
 
-======================================================================
-OUTPUT FORMAT
-======================================================================
+## OUTPUT FORMAT
 ONLY output strict JSON. No markdown. No backticks. No extra commentary.
 """
 
+
+SYSTEM_PROMPT = compact_prompt(_RAW_SYSTEM_PROMPT)
+
+# ==========================================================
+# RESPONSE PARSING
+# ==========================================================
+
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _dumps_canonical(data) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+    def _dumps_pretty(data) -> str:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode()
+else:
+    _loads = json.loads
+
+    def _dumps_canonical(data) -> bytes:
+        return json.dumps(data, sort_keys=True).encode()
+
+    def _dumps_pretty(data) -> str:
+        return json.dumps(data, indent=2, sort_keys=True)
+
+
+def _parse_output(text: str) -> dict:
+    """Validates the model's JSON against JDOutput."""
+    result = JDOutput.model_validate_json(text).model_dump()
+    # Callers have always received {} when clarification is needed.
+    if result["job_description"] is None:
+        result["job_description"] = {}
+    return result
+
+# ==========================================================
+# RESPONSE CACHE (EXACT + SEMANTIC)
+# ==========================================================
+
+MODEL_NAME = "gemini-2.5-flash"
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+# Bump whenever SYSTEM_PROMPT or GENERATION_CONFIG changes so JDs cached
+# for the old prompt are no longer served.
+PROMPT_VERSION = "v4"
+
+# Constrained decoding: the API only emits JSON matching JDOutput, and
+# temperature 0 makes repeated inputs reproducible (and cacheable).
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": response_schema(JDOutput),
+    "temperature": 0.0,
+}
+
+# Inputs whose role/department embed this close to a cached input (and
+# whose other fields, seniority included, match exactly) reuse the
+# cached JD.
+SEMANTIC_THRESHOLD = 0.95
+SEMANTIC_FIELDS = ("role", "department")
+
+_CACHE = SmartCache(path=CACHE_DIR / "inclusive_jd.sqlite3")
+
+
+def _cache_key(data) -> str:
+    digest = hashlib.sha256(_dumps_canonical(data)).hexdigest()
+    return f"{digest}|{MODEL_NAME}|{PROMPT_VERSION}"
+
+
+def _semantic_bucket(input_data: dict) -> str:
+    """
+    Key of the fields that are NOT embedded; they must match exactly.
+    The embedding model is part of it, since vectors from different
+    models are not comparable.
+    """
+    rest = {k: v for k, v in input_data.items() if k not in SEMANTIC_FIELDS}
+    return f"{_cache_key(rest)}|{EMBEDDING_MODEL}"
+
+
+def _embed_roles(inputs: list) -> list:
+    """
+    Embed role + department of each input in one request. An entry is
+    None where there is nothing to embed or the request failed.
+    """
+    texts = [" ".join(str(d.get(f) or "") for f in SEMANTIC_FIELDS).strip() for d in inputs]
+    todo = [text for text in texts if text]
+    if not todo:
+        return [None] * len(texts)
+    try:
+        vectors = iter(lazy_genai().embed_content(model=EMBEDDING_MODEL, content=todo)["embedding"])
+    except Exception:
+        # The semantic tier is an optimisation; fall back to generation.
+        return [None] * len(texts)
+    return [next(vectors) if text else None for text in texts]
+
+# ==========================================================
+# GEMINI MODEL
+# ==========================================================
+
+# SYSTEM_PROMPT is the models' system instruction, so only the
+# per-request input is added on each call.
+_MODELS = ModelCache(MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG)
+
 # ==========================================================
 # JD GENERATOR FUNCTION (PROMPT-DRIVEN + KB OPTIONAL)
 # ==========================================================
 
-def generate_inclusive_jd(input_data: dict, api_key: str = None) -> dict:
+def _build_prompt(input_data: dict) -> str:
+    """The per-request part of the prompt; SYSTEM_PROMPT is the model's prefix."""
+    return f"""USER INPUT:
+{_dumps_pretty(input_data)}
+
+Generate the JSON response now:
+"""
+
+
+def _error(notes: str) -> dict:
+    return {"status": "error", "notes": notes}
+
+
+def _lookup(input_data: dict, api_key: str = None, semantic: bool = True):
+    """
+    Resolves the API key and consults the response cache.
+    Returns (result, pending): `result` is a finished response (an error
+    or a cache hit); otherwise `pending` carries what `_store` needs to
+    cache the freshly generated JD. With semantic=False only the exact
+    tier is consulted; `_lookup_similar` does the rest.
+    """
+    _ensure_env()
+    key = api_key or _API_KEY
+    if not key:
+        return _error("Missing Google API Key. Set GOOGLE_API_KEY in .env."), None
+
+    cache_key = _cache_key(input_data)
+    cached = _CACHE.get(cache_key)
+    if cached is not None:
+        return _loads(cached), None
+
+    configure(key)
+
+    pending = (key, cache_key, None, _semantic_bucket(input_data))
+    if semantic:
+        return _lookup_similar(_embed_roles([input_data])[0], pending)
+    return None, pending
+
+
+def _lookup_similar(vector, pending):
+    """Semantic tier of `_lookup`, given the input's embedding."""
+    key, cache_key, _, bucket = pending
+    if vector is not None:
+        cached = _CACHE.get_similar(vector, bucket, SEMANTIC_THRESHOLD)
+        if cached is not None:
+            return _loads(cached), None
+    return None, (key, cache_key, vector, bucket)
+
+
+def _store(text: str, pending) -> dict:
+    """Parses the raw model output and caches it on success."""
+    _, cache_key, vector, bucket = pending
+    result = _parse_output(text)
+    data = _dumps_canonical(result)
+    _CACHE.put(cache_key, data, size=len(data), vector=vector, bucket=bucket)
+    return result
+
+
+@retry_transient
+def _generate_content(model, prompt: str, **kwargs):
+    return model.generate_content(prompt, **kwargs)
+
+
+def generate_inclusive_jd(input_data: dict, api_key: str = None, stream: bool = False) -> dict:
     """
     Generates an inclusive job description using Google Gemini.
     Logic is entirely prompt-driven. KB context may be injected,
     but retrieval is external (separate module).
+    With stream=True the raw output is echoed to stdout as it arrives,
+    so interactive users see progress instead of waiting in silence.
     """
-    # Load API key
-    env_path = Path(__file__).parent.parent / ".env"
-    load_dotenv(env_path)
-    load_dotenv()
+    result, pending = _lookup(input_data, api_key)
+    if result is not None:
+        return result
 
-    key = api_key or os.getenv("GOOGLE_API_KEY")
-    if not key:
-        return {
-            "status": "error",
-            "notes": "Missing Google API Key. Set GOOGLE_API_KEY in .env."
-        }
+    try:
+        model = _MODELS.get(pending[0])
+        prompt = _build_prompt(input_data)
+        if stream:
+            chunks = []
+            for chunk in _generate_content(model, prompt, stream=True):
+                sys.stdout.write(chunk.text)
+                sys.stdout.flush()
+                chunks.append(chunk.text)
+            sys.stdout.write("\n")
+            text = "".join(chunks)
+        else:
+            text = _generate_content(model, prompt).text
+        return _store(text, pending)
 
-    genai.configure(api_key=key)
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    except Exception as e:
+        return _error(f"Generation failed: {str(e)}")
 
-    # Construct prompt
-    prompt = f"""{SYSTEM_PROMPT}
 
-USER INPUT:
-{json.dumps(input_data, indent=2)}
+async def generate_inclusive_jd_async(input_data: dict, api_key: str = None) -> dict:
+    """
+    Async variant of `generate_inclusive_jd` for callers that already
+    run an event loop and want several JDs in flight at once.
+    """
+    # The SDK's async client stays bound to the first event loop that
+    # used it, and the model is shared process-wide, so the blocking
+    # call runs in a worker thread instead.
+    return await asyncio.to_thread(generate_inclusive_jd, input_data, api_key)
 
-Generate the JSON response now:
-"""
+# ==========================================================
+# CONCURRENT JD GENERATION
+# ==========================================================
 
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
+# Upper bound on concurrent Gemini calls issued by generate_inclusive_jd_many.
+MAX_CONCURRENCY = 8
+
+
+def generate_inclusive_jd_many(
+    inputs: list, api_key: str = None, concurrency: int = MAX_CONCURRENCY
+) -> list:
+    """
+    Generates JDs for several inputs concurrently, e.g. one per open
+    req. Results are returned in the same order as `inputs`.
+    """
+    keys = [_dumps_canonical(input_data) for input_data in inputs]
+    # Identical inputs are generated once; each caller gets its own copy.
+    unique = dict(zip(keys, inputs))
+
+    # Worker threads with the sync client, not asyncio.run(): the SDK's
+    # async client would stay bound to the first call's event loop.
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(
+            lambda input_data: generate_inclusive_jd(input_data, api_key), unique.values()
+        )
+        by_key = dict(zip(unique, results))
+    return [copy.deepcopy(by_key[key]) for key in keys]
 
-        # Remove accidental code block formatting
-        if text.startswith("```"):
-            parts = text.split("```")
-            if len(parts) >= 3:
-                text = parts[1]
-                if text.startswith("json"):
-                    text = text[4:].lstrip()
+# ==========================================================
+# BULK JD GENERATION (GEMINI BATCH MODE)
+# ==========================================================
 
-        return json.loads(text)
+BATCH_POLL_SECONDS = 30
+_BATCH_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
 
-    except Exception as e:
-        return {
-            "status": "error",
-            "notes": f"Generation failed: {str(e)}",
+
+def generate_inclusive_jd_batch(
+    inputs: list, api_key: str = None, poll_interval: float = BATCH_POLL_SECONDS
+) -> list:
+    """
+    Generates JDs for many inputs through Gemini Batch Mode.
+    Batch jobs cost about half of on-demand calls but can take minutes
+    to hours, so this is meant for bulk runs, not the interactive CLI.
+    Cached inputs are answered locally and never submitted. Results
+    are returned in the same order as `inputs`.
+    """
+    # Batch Mode is only exposed by the newer google-genai SDK; import it
+    # here so regular single-JD callers never pay for it.
+    from google import genai as genai_sdk
+
+    results = [None] * len(inputs)
+    misses = []
+    for i, input_data in enumerate(inputs):
+        result, pending = _lookup(input_data, api_key, semantic=False)
+        if result is not None:
+            results[i] = result
+        else:
+            misses.append((i, input_data, pending))
+
+    # Every exact-tier miss is embedded in a single request.
+    todo = []
+    vectors = _embed_roles([input_data for _, input_data, _ in misses])
+    for (i, input_data, pending), vector in zip(misses, vectors):
+        result, pending = _lookup_similar(vector, pending)
+        if result is not None:
+            results[i] = result
+        else:
+            todo.append((i, input_data, pending))
+    if not todo:
+        return results
+
+    client = genai_sdk.Client(api_key=api_key or _API_KEY)
+    requests = [
+        {
+            "contents": [{"role": "user", "parts": [{"text": _build_prompt(input_data)}]}],
+            "config": {"system_instruction": SYSTEM_PROMPT, **GENERATION_CONFIG},
         }
+        for _, input_data, _ in todo
+    ]
+
+    try:
+        job = client.batches.create(model=MODEL_NAME, src=requests)
+        while job.state.name not in _BATCH_DONE_STATES:
+            time.sleep(poll_interval)
+            job = client.batches.get(name=job.name)
+    except Exception as e:
+        for i, _, _ in todo:
+            results[i] = _error(f"Batch generation failed: {str(e)}")
+        return results
+
+    if job.state.name != "JOB_STATE_SUCCEEDED":
+        for i, _, _ in todo:
+            results[i] = _error(f"Batch job ended in state {job.state.name}.")
+        return results
+
+    for (i, _, pending), inlined in zip(todo, job.dest.inlined_responses):
+        if inlined.error is not None:
+            results[i] = _error(f"Generation failed: {inlined.error.message}")
+            continue
+        try:
+            results[i] = _store(inlined.response.text, pending)
+        except Exception as e:
+            results[i] = _error(f"Generation failed: {str(e)}")
+    return results
 
 # ==========================================================
 # INTERACTIVE CLI LOOP
 # ==========================================================
 
+# Prompts asked after the role, in order: (input key, label)
+FIELDS = (
+    ("location", "Location"),
+    ("seniority", "Seniority"),
+    ("department", "Department (or 'don't know')"),
+    ("responsibilities", "Responsibilities (or 'don't know')"),
+    ("requirements", "Requirements (or 'don't know')"),
+    ("brand_tone", "Brand Tone (optional)"),
+)
+
+
+def _print_result(future) -> None:
+    print("\n>> Job description:\n")
+    print(json.dumps(future.result(), indent=2))
+
+
 if __name__ == "__main__":
     print("\n=== SCOUT — JD GENERATOR (Interactive Mode) ===")
     print("Type 'exit' anytime to quit.\n")
 
-    while True:
-        print("\n----------------------------------------")
-        role = input("Role (or 'exit'): ").strip()
-        if role.lower() == "exit":
-            break
-
-        jd_input = {
-            "role": role,
-            "location": input("Location: ").strip(),
-            "seniority": input("Seniority: ").strip(),
-            "department": input("Department (or 'don't know'): ").strip(),
-            "responsibilities": input("Responsibilities (or 'don't know'): ").strip(),
-            "requirements": input("Requirements (or 'don't know'): ").strip(),
-            "brand_tone": input("Brand Tone (optional): ").strip(),
-            "kb_context": ""   # RAG comes later
-        }
-
-        print("\n>> Generating job description...\n")
-        result = generate_inclusive_jd(jd_input)
-        print(json.dumps(result, indent=2))
+    # Generation runs in the background so the next role can be typed
+    # while Gemini works on the previous one. Output is not streamed
+    # here because it would interleave with the prompts.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pending = None
+        while True:
+            if pending is not None and pending.done():
+                _print_result(pending)
+                pending = None
+
+            print("\n----------------------------------------")
+            role = input("Role (or 'exit'): ").strip()
+            if role.lower() == "exit":
+                break
+
+            jd_input = {"role": role}
+            jd_input.update({key: input(f"{label}: ").strip() for key, label in FIELDS})
+            jd_input["kb_context"] = ""   # RAG comes later
+
+            if pending is not None:
+                _print_result(pending)
+            print("\n>> Generating job description in the background...")
+            pending = executor.submit(generate_inclusive_jd, jd_input)
+
+        if pending is not None:
+            _print_result(pending)
@@ -0,0 +1,113 @@
+"""
+Gemini SDK helpers shared by the recruitment agents.
+"""
+
+import re
+import textwrap
+import threading
+
+# google.generativeai pulls in gRPC, protobuf and google-auth (several
+# hundred ms), so it is imported on first use rather than at import.
+_genai = None
+
+
+def lazy_genai():
+    """Return the google.generativeai module, importing it on first use."""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        _genai = genai
+    return _genai
+
+
+# genai.configure() discards the SDK's cached clients, so it only runs
+# when the key changes.  Both agents configure through here, so the
+# recorded key is always the one the SDK is actually using.
+_CONFIGURED_KEY = None
+_CONFIGURE_LOCK = threading.Lock()
+
+
+def configure(api_key: str) -> None:
+    """Make `api_key` the key the SDK sends with the calls that follow."""
+    global _CONFIGURED_KEY
+    with _CONFIGURE_LOCK:
+        if api_key != _CONFIGURED_KEY:
+            lazy_genai().configure(api_key=api_key)
+            _CONFIGURED_KEY = api_key
+
+
+def compact_prompt(prompt: str) -> str:
+    """Drop indentation, trailing spaces and extra blank lines; they are
+    billed as input tokens on every call without changing the meaning."""
+    prompt = textwrap.dedent(prompt).strip()
+    prompt = re.sub(r"[ \t]+\n", "\n", prompt)
+    return re.sub(r"\n{3,}", "\n\n", prompt)
+
+
+class ModelCache:
+    """
+    GenerativeModel for a fixed model name, system prompt and generation
+    config, built on first use and then reused.
+
+    A model holds on to the client of the API key that was configured
+    when it first ran, so one model is kept per key.
+    """
+
+    def __init__(self, model_name: str, system_prompt: str, generation_config: dict) -> None:
+        self.model_name = model_name
+        self.system_prompt = system_prompt
+        self.generation_config = generation_config
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def get(self, api_key: str = None):
+        model = self._models.get(api_key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(api_key)
+                if model is None:
+                    model = lazy_genai().GenerativeModel(
+                        self.model_name,
+                        system_instruction=self.system_prompt,
+                        generation_config=self.generation_config,
+                    )
+                    self._models[api_key] = model
+        return model
+
+
+def response_schema(model) -> dict:
+    """
+    Gemini response schema for a pydantic model.
+
+    Passing the model class itself lets google.generativeai drop every
+    `required` list, so Gemini may leave fields out.  This builds the
+    OpenAPI-subset dict Gemini expects instead: $refs inlined,
+    Optional[...] as `nullable`, Literal[...] as a string enum, and
+    `required` kept for every field without a default.
+    """
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def convert(node: dict) -> dict:
+        ref = node.get("$ref")
+        if ref is not None:
+            return convert(defs[ref.rsplit("/", 1)[-1]])
+        any_of = node.get("anyOf")
+        if any_of is not None:
+            options = [option for option in any_of if option.get("type") != "null"]
+            if len(options) != 1 or len(any_of) != 2:
+                raise ValueError("Only Optional[...] unions are supported.")
+            return {**convert(options[0]), "nullable": True}
+
+        out = {"type": node["type"].upper()}
+        if "enum" in node:
+            out["format"] = "enum"
+            out["enum"] = node["enum"]
+        if "items" in node:
+            out["items"] = convert(node["items"])
+        if "properties" in node:
+            out["properties"] = {name: convert(value) for name, value in node["properties"].items()}
+            out["required"] = node.get("required", [])
+        return out
+
+    return convert(schema)
@@ -0,0 +1,250 @@
+"""
+Persistent two-tier response cache for the recruitment agents.
+
+Gemini calls dominate the latency and cost of the JD generator and the
+role refinement engine, so identical (or near-identical) inputs should
+never pay for a second round trip.  `SmartCache` keeps responses in an
+LRU-ordered `OrderedDict` bounded by total size and entry age:
+
+- exact tier: callers look up a SHA-256 key of the canonical input
+  (plus model name and prompt version, so bumping the prompt version
+  invalidates every old entry).
+- semantic tier: callers may attach an embedding vector to an entry
+  and later look up the closest stored vector by cosine similarity.
+  Vectors are grouped into buckets so that only entries sharing the
+  same non-embedded context can match each other.
+
+The cache is backed by a SQLite file so it survives restarts.  Each
+write or eviction touches only the affected rows, so persisting costs
+the same however large the cache has grown.  The file is only opened
+(and numpy imported) on first use, so importing an agent stays cheap.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CACHE_DIR = Path.home() / ".cache" / "scout_jd"
+
+# Stored in the file's user_version; files written with another layout
+# (e.g. the old pickled values) are emptied on load.
+_SCHEMA_VERSION = 2
+
+
+class SmartCache:
+    """Thread-safe LRU + TTL cache of bytes with an optional embedding index."""
+
+    def __init__(
+        self,
+        max_bytes: int = 100 * 1024 * 1024,
+        ttl: float = 86400,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self._lock = threading.RLock()
+        # key -> (value, size, expires_at); least recently used first
+        self._entries: "OrderedDict[str, Tuple[bytes, int, float]]" = OrderedDict()
+        self._size = 0
+        # bucket -> (keys, unit vectors stacked as an (N, dim) float32 matrix)
+        self._vectors: "Dict[str, Tuple[List[str], np.ndarray]]" = {}
+        self._vector_bucket: Dict[str, str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Exact tier
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for `key`, or None on a miss."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(
+        self,
+        key: str,
+        value: bytes,
+        size: int,
+        vector: "Optional[np.ndarray]" = None,
+        bucket: str = "",
+    ) -> None:
+        """Store `value` under `key` and evict old entries if needed.
+
+        When `vector` is given the entry also becomes reachable through
+        `get_similar` for lookups in the same `bucket`.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.time() + self.ttl
+            self._entries[key] = (value, size, expires_at)
+            self._size += size
+            row = None
+            if vector is not None:
+                row = self._add_vector(key, vector, bucket)
+            self._write(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    value,
+                    size,
+                    expires_at,
+                    bucket if row is not None else None,
+                    row.tobytes() if row is not None else None,
+                ),
+            )
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    # ------------------------------------------------------------------
+    # Semantic tier
+    # ------------------------------------------------------------------
+
+    def get_similar(
+        self, vector: "np.ndarray", bucket: str = "", threshold: float = 0.95
+    ) -> Optional[bytes]:
+        """Return the value whose vector is closest to `vector`.
+
+        Only entries in `bucket` are considered, and the best match must
+        have a cosine similarity of at least `threshold`.  Vectors of a
+        different dimension never match.
+        """
+        import numpy as np
+
+        with self._lock:
+            self._ensure_loaded()
+            indexed = self._vectors.get(bucket)
+            if indexed is None:
+                return None
+            keys, matrix = indexed
+            if matrix.shape[1] != len(vector):
+                return None
+            scores = matrix @ _normalize(vector)
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+            return self.get(keys[best])
+
+    def _add_vector(self, key: str, vector: "np.ndarray", bucket: str) -> "np.ndarray":
+        """Index `vector` under `key`; returns the stored unit vector."""
+        import numpy as np
+
+        row = _normalize(vector)
+        keys, matrix = self._vectors.get(bucket, ([], None))
+        if matrix is None:
+            self._vectors[bucket] = ([key], row[np.newaxis, :])
+        else:
+            self._vectors[bucket] = (keys + [key], np.vstack([matrix, row]))
+        self._vector_bucket[key] = bucket
+        return row
+
+    # ------------------------------------------------------------------
+    # Housekeeping
+    # ------------------------------------------------------------------
+
+    def clear(self) -> None:
+        """Drop every entry from memory and disk."""
+        with self._lock:
+            self._ensure_loaded()
+            self._entries.clear()
+            self._vectors.clear()
+            self._vector_bucket.clear()
+            self._size = 0
+            self._write("DELETE FROM entries")
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+        self._write("DELETE FROM entries WHERE key = ?", (key,))
+        bucket = self._vector_bucket.pop(key, None)
+        if bucket is None:
+            return
+        keys, matrix = self._vectors[bucket]
+        index = keys.index(key)
+        if len(keys) == 1:
+            del self._vectors[bucket]
+        else:
+            import numpy as np
+
+            self._vectors[bucket] = (
+                keys[:index] + keys[index + 1:],
+                np.delete(matrix, index, axis=0),
+            )
+
+    def _ensure_loaded(self) -> None:
+        """Open the backing file and load it, on first use."""
+        if not self._loaded:
+            self._loaded = True
+            self._load()
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                with db:
+                    db.execute("DROP TABLE IF EXISTS entries")
+                    db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, "
+                "expires_at REAL, bucket TEXT, vector BLOB)"
+            )
+            now = time.time()
+            with db:
+                db.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+            rows = db.execute(
+                "SELECT key, value, size, expires_at, bucket, vector "
+                "FROM entries ORDER BY expires_at"
+            ).fetchall()
+        except (OSError, sqlite3.Error):
+            # Persistence is best effort; the in-memory cache still works.
+            return
+        self._db = db
+        for key, value, size, expires_at, bucket, vector in rows:
+            self._entries[key] = (value, size, expires_at)
+            self._size += size
+            if vector is not None:
+                import numpy as np
+
+                self._add_vector(key, np.frombuffer(vector, dtype=np.float32), bucket)
+
+    def _write(self, sql: str, params: tuple = ()) -> None:
+        """Apply one change to the backing file, if there is one."""
+        if self._db is None:
+            return
+        try:
+            with self._db:
+                self._db.execute(sql, params)
+        except sqlite3.Error:
+            # Persistence is best effort; the in-memory cache still works.
+            pass
+
+
+def _normalize(vector: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
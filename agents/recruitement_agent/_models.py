@@ -0,0 +1,58 @@
+"""
+Pydantic models shared by the recruitment agents.
+
+Defining each model once keeps the pydantic-core validators from being
+rebuilt by every module that needs them.
+"""
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+# -----------------------
+# Role Refinement
+# -----------------------
+
+class RefinedRole(BaseModel):
+    main_title: str
+    related_titles: List[str]
+    core_skills: List[str]
+    nice_to_have: List[str]
+    seniority_level: str
+    industry_focus: str
+
+
+class BooleanSearch(BaseModel):
+    linkedin: str
+    job_boards: str
+
+
+class RoleRefinementOutput(BaseModel):
+    status: Literal["ok", "needs_clarification"]
+    missing_info: List[str]
+    # null when the request needs clarification
+    refined_role: Optional[RefinedRole]
+    boolean_search: Optional[BooleanSearch]
+    notes: str
+
+
+# -----------------------
+# Inclusive Job Description
+# -----------------------
+
+class JobDescription(BaseModel):
+    full_text: str
+    summary: str
+    responsibilities: List[str]
+    requirements: List[str]
+    nice_to_have: List[str]
+    benefits: List[str]
+    inclusion_statement: str
+
+
+class JDOutput(BaseModel):
+    status: Literal["ok", "needs_clarification"]
+    missing_info: List[str]
+    # null when the request needs clarification
+    job_description: Optional[JobDescription]
+    notes: str
@@ -0,0 +1,38 @@
+"""
+Retry policy for Gemini calls shared by the recruitment agents.
+
+Rate limiting (429), temporary unavailability (503) and deadline
+overruns are retried with exponential backoff so a transient blip does
+not cost the caller a full round trip.  Anything else (invalid
+arguments, unparseable output, ...) is raised immediately.
+"""
+
+import logging
+
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def is_transient(exc: BaseException) -> bool:
+    # Imported lazily: google.api_core.exceptions drags in gRPC, and this
+    # only runs once a call has already failed.
+    from google.api_core.exceptions import DeadlineExceeded, ResourceExhausted, ServiceUnavailable
+
+    return isinstance(exc, (ResourceExhausted, ServiceUnavailable, DeadlineExceeded))
+
+
+# Works for both plain functions and coroutines.
+retry_transient = retry(
+    retry=retry_if_exception(is_transient),
+    wait=wait_exponential(multiplier=0.5, max=8),
+    stop=stop_after_attempt(4),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
@@ -1,44 +1,61 @@
-import re
+import os
 import json
-from typing import List, Literal
-from pydantic import BaseModel
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-load_dotenv()
-genai.configure()
-
-# -----------------------
-# Pydantic Models
-# -----------------------
-
-class RefinedRole(BaseModel):
-    main_title: str
-    related_titles: List[str]
-    core_skills: List[str]
-    nice_to_have: List[str]
-    seniority_level: str
-    industry_focus: str
+import asyncio
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+from dotenv import load_dotenv
 
-class BooleanSearch(BaseModel):
-    linkedin: str
-    job_boards: str
-
-
-class RoleRefinementOutput(BaseModel):
-    status: Literal["ok", "needs_clarification"]
-    missing_info: List[str]
-    refined_role: RefinedRole
-    boolean_search: BooleanSearch
-    notes: str
-
+# The models live in _models.py; they are re-exported here for callers
+# that import them from this module.
+try:
+    from ._gemini import ModelCache, compact_prompt, configure, response_schema
+    from ._jd_cache import CACHE_DIR, SmartCache
+    from ._models import BooleanSearch, RefinedRole, RoleRefinementOutput
+    from ._retry import retry_transient
+except ImportError:
+    from _gemini import ModelCache, compact_prompt, configure, response_schema
+    from _jd_cache import CACHE_DIR, SmartCache
+    from _models import BooleanSearch, RefinedRole, RoleRefinementOutput
+    from _retry import retry_transient
+
+
+@functools.lru_cache(maxsize=None)
+def _api_key():
+    """GOOGLE_API_KEY, with .env loaded on first use."""
+    load_dotenv()
+    return os.getenv("GOOGLE_API_KEY")
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Bump whenever SYSTEM_PROMPT or GENERATION_CONFIG changes so cached
+# refinements from the old prompt are no longer served.
+PROMPT_VERSION = "v4"
+
+# Constrained decoding: the API only emits JSON matching
+# RoleRefinementOutput, and temperature 0 keeps repeated inputs stable.
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": response_schema(RoleRefinementOutput),
+    "temperature": 0.0,
+}
+
+_CACHE = SmartCache(path=CACHE_DIR / "role_refinement.sqlite3")
 
 # -----------------------
 # System Prompt
 # -----------------------
 
-SYSTEM_PROMPT = """
+_RAW_SYSTEM_PROMPT = """
                 You are a recruitment sourcing assistant.
 
                 Your job:
@@ -48,9 +65,7 @@ SYSTEM_PROMPT = """
                 - Produce deterministic Boolean search strings
                 - Output JSON only (no explanations)
 
-                ====================================================
-                1. INPUT VALIDATION
-                ====================================================
+                ## 1. INPUT VALIDATION
                 Validate the user input for:
                 - role/title (mandatory)
                 - location (optional)
@@ -66,9 +81,7 @@ SYSTEM_PROMPT = """
                 "notes": "Role/title is required."
                 }
 
-                ====================================================
-                2. SKILL ENGINE (Hybrid Logic)
-                ====================================================
+                ## 2. SKILL ENGINE (Hybrid Logic)
 
                 CASE A — User provides skills:
                     STRICT MODE:
@@ -94,9 +107,7 @@ SYSTEM_PROMPT = """
                 - Focus more on leadership, system-level skills, architecture, stakeholder mgmt.
                 - Reduce generic soft skills unless critical.
 
-                ====================================================
-                3. SENIORITY INFERENCE
-                ====================================================
+                ## 3. SENIORITY INFERENCE
                 Infer seniority using patterns:
 
                 Junior:
@@ -111,9 +122,7 @@ SYSTEM_PROMPT = """
 
                 If unclear → default to **mid-level**.
 
-                ====================================================
-                4. ROLE REFINEMENT
-                ====================================================
+                ## 4. ROLE REFINEMENT
                 Produce:
 
                 - main_title  
@@ -137,9 +146,7 @@ SYSTEM_PROMPT = """
                 - nice_to_have ≠ core_skills
                 - senior roles → prioritize strategic & leadership-oriented nice_to_have
 
-                ====================================================
-                5. BOOLEAN GENERATION (Deterministic & Safe)
-                ====================================================
+                ## 5. BOOLEAN GENERATION (Deterministic & Safe)
 
                 LinkedIn Boolean:
                 - ("main_title" OR related_titles…)
@@ -161,9 +168,7 @@ SYSTEM_PROMPT = """
                 - No nice_to_have in core skills
                 - Must be job-board friendly (no special characters)
 
-                ====================================================
-                6. OUTPUT RULES
-                ====================================================
+                ## 6. OUTPUT RULES
 
                 Return JSON ONLY in this exact format:
 
@@ -192,6 +197,26 @@ SYSTEM_PROMPT = """
 """
 
 
+SYSTEM_PROMPT = compact_prompt(_RAW_SYSTEM_PROMPT)
+
+
+# -----------------------
+# Gemini Model
+# -----------------------
+
+# SYSTEM_PROMPT is the model's system instruction; only the user input
+# is added per request.
+_MODELS = ModelCache(MODEL_NAME, SYSTEM_PROMPT, GENERATION_CONFIG)
+
+
+def _get_model():
+    # The JD generator may have configured the SDK for another key since
+    # the last call, so the key is applied on every request.
+    key = _api_key()
+    configure(key)
+    return _MODELS.get(key)
+
+
 # -----------------------
 # Utility
 # -----------------------
@@ -199,53 +224,159 @@ SYSTEM_PROMPT = """
 def stabilize(values):
     if not isinstance(values, list):
         return values
-    return sorted(set(values), key=str.lower)
+    # Case-insensitive dedup in one pass, keeping the first spelling seen
+    seen = {}
+    for v in values:
+        seen.setdefault(v.casefold(), v)
+    return sorted(seen.values(), key=str.casefold)
+
+STABLE_LIST_FIELDS = ("related_titles", "core_skills", "nice_to_have")
+
+def stabilize_lists(rr):
+    """Stabilize every list field of a RefinedRole in place."""
+    for field in STABLE_LIST_FIELDS:
+        setattr(rr, field, stabilize(getattr(rr, field)))
 
 def clean_boolean_string(s):
     if not isinstance(s, str):
         return ""
     return s.replace("\\", "").strip()
 
+if orjson is not None:
+    _dumps = orjson.dumps
+else:
+    def _dumps(data) -> bytes:
+        return json.dumps(data).encode()
+
+def _cache_key(user_input: str) -> str:
+    digest = hashlib.sha256(_dumps(user_input)).hexdigest()
+    return f"{digest}|{MODEL_NAME}|{PROMPT_VERSION}"
+
 
 # -----------------------
 # MAIN FUNCTION (Final)
 # -----------------------
 
+def _build_prompt(user_input: str) -> str:
+    return f"### USER INPUT:\n{user_input}\n### END"
+
+
+@retry_transient
+def _generate_content(model, prompt: str):
+    return model.generate_content(prompt)
+
+
+def normalize_input(user_input: str) -> str:
+    """Casefold and collapse whitespace so trivially different spellings
+    of the same request share one cache entry."""
+    return " ".join(user_input.casefold().split())
+
+
+def _finalize(raw: str, cache_key: str) -> bytes:
+    """Post-process raw model output; returns (and caches) validated JSON."""
+    # Schema-constrained output, so validation is the only parsing needed
+    result = RoleRefinementOutput.model_validate_json(raw)
+
+    # Both are null when the request needs clarification
+    rr = result.refined_role
+    if rr is not None:
+        # Sort lists deterministically
+        stabilize_lists(rr)
+
+        # Standardize industry focus
+        rr.industry_focus = rr.industry_focus.title() or "General"
+
+    b = result.boolean_search
+    if b is not None:
+        # Clean Boolean strings
+        b.linkedin = clean_boolean_string(b.linkedin)
+        b.job_boards = clean_boolean_string(b.job_boards)
+
+    text = result.model_dump_json().encode()
+    _CACHE.put(cache_key, text, size=len(text))
+    return text
+
+
+# Refinements memoised in process, keyed by normalize_input(); JSON text
+# is kept rather than the model, which callers may mutate.
+_MEMO: "OrderedDict[str, bytes]" = OrderedDict()
+_MEMO_SIZE = 512
+_MEMO_LOCK = threading.Lock()
+
+
+def _lookup(norm_input: str):
+    """Memoised or cached JSON for `norm_input`, or None on a miss."""
+    with _MEMO_LOCK:
+        raw = _MEMO.get(norm_input)
+        if raw is not None:
+            _MEMO.move_to_end(norm_input)
+            return raw
+    raw = _CACHE.get(_cache_key(norm_input))
+    if raw is not None:
+        _remember(norm_input, raw)
+    return raw
+
+
+def _remember(norm_input: str, raw: bytes) -> None:
+    with _MEMO_LOCK:
+        _MEMO[norm_input] = raw
+        _MEMO.move_to_end(norm_input)
+        if len(_MEMO) > _MEMO_SIZE:
+            _MEMO.popitem(last=False)
+
+
+def _store(norm_input: str, text: str) -> bytes:
+    raw = _finalize(text, _cache_key(norm_input))
+    _remember(norm_input, raw)
+    return raw
+
+
 def run_role_refinement(user_input: str) -> RoleRefinementOutput:
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    # The normalised text only keys the caches; the model gets the
+    # caller's own text so acronyms and proper nouns keep their casing.
+    norm_input = normalize_input(user_input)
+    raw = _lookup(norm_input)
+    if raw is None:
+        response = _generate_content(_get_model(), _build_prompt(user_input))
+        raw = _store(norm_input, response.text)
+    return RoleRefinementOutput.model_validate_json(raw)
+
+
+def _clear_memo() -> None:
+    with _MEMO_LOCK:
+        _MEMO.clear()
+
+# Drop memoised results, e.g. after bumping PROMPT_VERSION.
+run_role_refinement.cache_clear = _clear_memo
 
-    # Build stable prompt
-    final_prompt = f"{SYSTEM_PROMPT}\n\n### USER INPUT:\n{user_input}\n### END"
 
-    response = model.generate_content(final_prompt)
-    raw = response.text.strip()
+async def run_role_refinement_async(user_input: str) -> RoleRefinementOutput:
+    # The SDK's async client stays bound to the first event loop that
+    # used it, and the cache lookups block on SQLite, so the whole call
+    # runs in a worker thread.
+    return await asyncio.to_thread(run_role_refinement, user_input)
 
-    # Safe JSON extraction
-    try:
-        data = json.loads(raw)
-    except:
-        import re
-        json_match = re.search(r"\{(?:[^{}]|(?:\{[^{}]*\}))*\}", raw, re.DOTALL)
-        if not json_match:
-            raise ValueError("AI output did not contain valid JSON.")
-        data = json.loads(json_match.group(0))
 
-    # Sort lists deterministically
-    rr = data.get("refined_role", {})
-    rr["related_titles"] = stabilize(rr.get("related_titles", []))
-    rr["core_skills"] = stabilize(rr.get("core_skills", []))
-    rr["nice_to_have"] = stabilize(rr.get("nice_to_have", []))
+# Upper bound on concurrent Gemini calls issued by run_role_refinement_many.
+MAX_CONCURRENCY = 8
 
-    # Standardize industry focus
-    rr["industry_focus"] = rr.get("industry_focus", "").title() or "General"
 
-    # Clean Boolean strings
-    b = data.get("boolean_search", {})
-    b["linkedin"] = clean_boolean_string(b.get("linkedin", ""))
-    b["job_boards"] = clean_boolean_string(b.get("job_boards", ""))
+def run_role_refinement_many(
+    inputs: List[str], concurrency: int = MAX_CONCURRENCY
+) -> List[RoleRefinementOutput]:
+    """Refine several roles concurrently; results keep the input order."""
+    keys = [normalize_input(user_input) for user_input in inputs]
+    # Inputs that normalise to the same text are refined once; each
+    # position still gets its own copy of the result.
+    unique = {}
+    for key, user_input in zip(keys, inputs):
+        unique.setdefault(key, user_input)
 
-    # Return validated output
-    return RoleRefinementOutput(**data)
+    # Worker threads with the sync client, not asyncio.run(): the SDK's
+    # async client would stay bound to the first call's event loop.
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        by_key = dict(zip(unique, executor.map(run_role_refinement, unique.values())))
+    return [by_key[key].model_copy(deep=True) for key in keys]
 
 
 # -----------------------
@@ -254,4 +385,4 @@ def run_role_refinement(user_input: str) -> RoleRefinementOutput:
 
 if __name__ == "__main__":
     result = run_role_refinement("Software Engineer — New York")
-    print(json.dumps(result.dict(), indent=2))
+    print(json.dumps(result.model_dump(), indent=2))
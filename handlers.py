@@ -4,24 +4,143 @@ handlers.py
 This module defines the `ScoutAgent` class, which acts as the core
 conversation handler and orchestrator for the Scout recruitment agent.
 The agent maintains a chat history, determines the user's intent and
-routes requests to the appropriate handler function.  Each handler
-uses a prompt template defined in `prompt_templates.py` and returns
-the final formatted prompt.  In a production setting these
-handlers would invoke a language model with the template and
-parameters, but here they simply return the templated string for
-testing and demonstration purposes.
+fills in the prompt template for that intent, defined in
+`prompt_templates.py`, from a table of parameters and defaults.  In a
+production setting the agent would invoke a language model with the
+template and parameters, but here it simply returns the templated
+string for testing and demonstration purposes.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import List, Dict, Callable, Optional
-import re
+from dataclasses import dataclass
+from typing import ClassVar, Iterator, List, Dict, Mapping, Optional, Tuple, Union
+import functools
+
+from .prompt_templates import TEMPLATES, render
+
+
+# Keyword patterns tried in order; order matters for specificity.
+_INTENT_PATTERNS = (
+    (r"\b(?:boolean|search|role refinement)\b", "role_refinement"),
+    (r"\b(?:job description|draft jd|write jd|inclusive jd)\b", "inclusive_jd"),
+    (r"\boutreach|message\b", "outreach_message"),
+    (r"\bsourcing|market map|channels\b", "sourcing_plan"),
+    (r"\binterview guide|scorecard\b", "interview_guide"),
+    (r"\btask triage|daily digest\b", "task_triage"),
+    (r"\boffer|onboarding\b", "offer_handover"),
+    (r"\bsummary|summarise candidate|candidate profile\b", "candidate_summary"),
+    (r"\bsalary benchmark|market insight|labor market\b", "market_insights"),
+)
+
+# Canonical leading commands, such as "role refinement: ...".  When the
+# text before the first colon is one of these, it names the intent
+# directly and keyword matching is skipped.
+_INTENT_PREFIX: Dict[str, str] = {
+    "role refinement": "role_refinement",
+    "boolean search": "role_refinement",
+    "inclusive jd": "inclusive_jd",
+    "job description": "inclusive_jd",
+    "outreach": "outreach_message",
+    "outreach message": "outreach_message",
+    "sourcing": "sourcing_plan",
+    "sourcing plan": "sourcing_plan",
+    "interview guide": "interview_guide",
+    "task triage": "task_triage",
+    "daily digest": "task_triage",
+    "offer handover": "offer_handover",
+    "onboarding": "offer_handover",
+    "candidate summary": "candidate_summary",
+    "market insights": "market_insights",
+}
+_INTENT_PREFIX.update({intent: intent for intent in TEMPLATES})
+
+# Default for every template parameter.  Missing parameters fall back
+# to placeholder values; in a real system the user would be prompted
+# for the missing information instead.  A key shared by several
+# templates has the same default in all of them.
+_DEFAULTS: Dict[str, str] = {
+    "role_title": "[role title]",
+    "location": "[location]",
+    "seniority": "[seniority]",
+    "must_have": "[must‑have skills]",
+    "nice_to_have": "[nice‑to‑have skills]",
+    "responsibilities": "[responsibilities]",
+    "requirements": "[requirements]",
+    "benefits": "[benefits]",
+    "brand_tone": "neutral",
+    "candidate_name": "[candidate]",
+    "top_skills": "[top skills]",
+    "value_proposition": "[value proposition]",
+    "jd_link": "[JD link]",
+    "tone": "professional",
+    "industry": "[industry/domain]",
+    "competencies": "[competencies]",
+    "stages": "phone, technical, panel",
+    "open_roles": "[open roles]",
+    "candidate_stages": "[candidate stages]",
+    "pending_feedback": "[pending feedback]",
+    "upcoming_interviews": "[upcoming interviews]",
+    "start_date": "[start date]",
+    "onboarding_sops": "[onboarding SOPs]",
+    "candidate_cv": "[candidate CV text]",
+    "role_requirements": "[role requirements]",
+}
+
+
+@functools.cache
+def _param_re():
+    """Regex for one comma-separated key=value piece, compiled on first use.
+
+    The whitespace around the key and the value is left outside the
+    groups.  The key stops at the first equals sign; the value runs to
+    the next comma.
+    """
+    import re
+
+    return re.compile(r"\s*([^,=]*?)\s*=\s*([^,]*?)\s*(?:,|\Z)")
+
+
+class _DefaultDict(dict):
+    """Parameter dict that falls back to `_DEFAULTS` for missing keys."""
+
+    def __missing__(self, key: str) -> str:
+        return _DEFAULTS[key]
+
+
+@functools.lru_cache(maxsize=512)
+def _render(intent: str, items: Tuple[Tuple[str, str], ...]) -> str:
+    """Render `intent`'s template from sorted (key, value) parameter pairs.
+
+    Recruiters often repeat the same role, location and seniority, so
+    the finished prompt is memoised per intent and parameter set.
+    """
+    return render(intent, _DefaultDict(items))
+
+
+@functools.cache
+def _intent_res():
+    """`_INTENT_PATTERNS` with each pattern compiled, on first use."""
+    import re
 
-from .prompt_templates import get_templates
+    return tuple((re.compile(pattern), intent) for pattern, intent in _INTENT_PATTERNS)
 
 
-@dataclass
+def _match_intent(message: str) -> Optional[str]:
+    """Keyword matching behind `ScoutAgent.get_intent`."""
+    msg_lower = message.lower()
+    for pattern, intent in _intent_res():
+        if pattern.search(msg_lower):
+            return intent
+    return None
+
+
+def clear_cache() -> None:
+    """Drop every memoised prompt, e.g. between tests."""
+    _render.cache_clear()
+
+
+@dataclass(slots=True, frozen=True)
 class Message:
     """A single chat message with a role and content."""
 
@@ -29,226 +148,85 @@ class Message:
     content: str
 
 
+# Common message roles, stored in the history as their index in this
+# tuple.  Any other role (e.g. "system") is stored as the string itself.
+_ROLES = ("user", "assistant")
+_ROLE_CODES: Dict[str, int] = {role: code for code, role in enumerate(_ROLES)}
+
+
 class ScoutAgent:
     """Core conversation handler for the Scout recruitment agent.
 
     The agent maintains a history of messages and routes incoming
-    user requests to the appropriate function handler.  Each handler
-    accepts a parameter dictionary and returns a string that
-    represents the prompt that would be sent to a language model.  In
-    future iterations these handlers could call an LLM API with
-    optional tool usage.
+    user requests by intent.  Each intent's template is filled in from
+    a parameter dictionary, producing the prompt that would be sent to
+    a language model.  In future iterations the agent could call an
+    LLM API with optional tool usage.
     """
 
+    # Shared by every agent; the mapping is read-only.
+    templates: ClassVar[Mapping[str, str]] = TEMPLATES
+
     def __init__(self) -> None:
-        self.history: List[Message] = []
-        self.templates: Dict[str, str] = get_templates()
-        # Mapping from intent names to handler methods
-        self.handlers: Dict[str, Callable[[Dict[str, str]], str]] = {
-            "role_refinement": self.handle_role_refinement,
-            "inclusive_jd": self.handle_inclusive_jd,
-            "outreach_message": self.handle_outreach_message,
-            "sourcing_plan": self.handle_sourcing_plan,
-            "interview_guide": self.handle_interview_guide,
-            "task_triage": self.handle_task_triage,
-            "offer_handover": self.handle_offer_handover,
-            "candidate_summary": self.handle_candidate_summary,
-            "market_insights": self.handle_market_insights,
-        }
+        # The chat history as parallel lists: role codes and contents.
+        self._roles: List[Union[int, str]] = []
+        self._contents: List[str] = []
 
     def add_message(self, role: str, content: str) -> None:
         """Append a message to the chat history."""
-        self.history.append(Message(role=role, content=content))
+        self._roles.append(_ROLE_CODES.get(role, role))
+        self._contents.append(content)
+
+    def messages(self) -> Iterator[Message]:
+        """Yield the chat history as `Message` objects, oldest first.
+
+        Messages are built on demand; the history itself only stores
+        role codes and contents.
+        """
+        for code, content in zip(self._roles, self._contents):
+            yield Message(_ROLES[code] if isinstance(code, int) else code, content)
 
     def get_intent(self, message: str) -> Optional[str]:
         """Determine user intent based on simple keyword matching.
 
-        This function returns the name of the handler function to call.
+        This function returns the name of the intent to route to.
         It uses heuristic rules for demonstration purposes.  In a
         production system, intent detection would be replaced with
         classification via an LLM or rule engine.
         """
-        msg_lower = message.lower()
-        # Keyword to handler mapping; order matters for specificity
-        patterns = [
-            (r"\b(boolean|search|role refinement)\b", "role_refinement"),
-            (r"\b(job description|draft jd|write jd|inclusive jd)\b", "inclusive_jd"),
-            (r"\boutreach|message\b", "outreach_message"),
-            (r"\bsourcing|market map|channels\b", "sourcing_plan"),
-            (r"\binterview guide|scorecard\b", "interview_guide"),
-            (r"\btask triage|daily digest\b", "task_triage"),
-            (r"\boffer|onboarding\b", "offer_handover"),
-            (r"\bsummary|summarise candidate|candidate profile\b", "candidate_summary"),
-            (r"\bsalary benchmark|market insight|labor market\b", "market_insights"),
-        ]
-        for pattern, intent in patterns:
-            if re.search(pattern, msg_lower):
-                return intent
-        return None
+        return _match_intent(message)
 
     def route_message(self, message: str) -> str:
-        """Route the message to the appropriate handler.
+        """Route the message to the template for its intent.
 
-        If no intent is matched, the agent responds with a default
-        message asking for clarification.  Otherwise, the handler is
-        called with parsed parameters.
+        A canonical leading command (e.g. "outreach:") selects the
+        intent directly; otherwise `get_intent` decides.  If no
+        intent is matched, the agent responds with a default message
+        asking for clarification.  Otherwise, the intent's template is
+        filled in with the parsed parameters.
         """
-        intent = self.get_intent(message)
+        head, colon, tail = message.partition(":")
+        intent = _INTENT_PREFIX.get(head.strip().lower()) or self.get_intent(message)
         if not intent:
             return "Sorry, I didn't understand your request. Could you please clarify?"
         # For this skeleton, we expect parameters to be provided in the message
         # in a simple comma-separated list of key=value pairs after a colon.
         # Example: "role refinement: role_title=Data Scientist, location=Melbourne, seniority=Mid"
-        params = self.parse_params_from_message(message)
-        handler = self.handlers[intent]
-        return handler(params)
+        # Same as parse_params_from_message, reusing the split above.
+        params = dict(_param_re().findall(tail)) if colon else {}
+        return _render(intent, tuple(sorted(params.items())))
 
     def parse_params_from_message(self, message: str) -> Dict[str, str]:
         """Parse key=value pairs from the message into a dictionary.
 
-        This helper looks for the first colon and splits the remainder by
-        commas.  It then splits each piece at the equals sign.  Keys and
-        values are stripped of whitespace.  If no colon is present, an
-        empty dict is returned.  This is a simple parser and does not
-        handle quoted values or complex syntax.
+        This helper looks for the first colon and scans the remainder
+        for comma-separated pieces, each split at its first equals sign.
+        Keys and values are stripped of whitespace and pieces without an
+        equals sign are skipped.  If no colon is present, an empty dict
+        is returned.  This is a simple parser and does not handle quoted
+        values or complex syntax.
         """
-        params: Dict[str, str] = {}
-        if ":" not in message:
-            return params
-        _, tail = message.split(":", 1)
-        parts = tail.split(",")
-        for part in parts:
-            if "=" in part:
-                key, value = part.split("=", 1)
-                params[key.strip()] = value.strip()
-        return params
-
-    # Handler implementations.  Each handler fills in the template with
-    # provided parameters or sensible defaults.  If required parameters
-    # are missing, the handler will use placeholder values and prompt
-    # the user to provide the missing information in a real system.
-
-    def handle_role_refinement(self, params: Dict[str, str]) -> str:
-        template = self.templates["role_refinement"]
-        role_title = params.get("role_title", "[role title]")
-        location = params.get("location", "[location]")
-        seniority = params.get("seniority", "[seniority]")
-        must_have = params.get("must_have", "[must‑have skills]")
-        nice_to_have = params.get("nice_to_have", "[nice‑to‑have skills]")
-        return template.format(
-            role_title=role_title,
-            location=location,
-            seniority=seniority,
-            must_have=must_have,
-            nice_to_have=nice_to_have,
-        )
-
-    def handle_inclusive_jd(self, params: Dict[str, str]) -> str:
-        template = self.templates["inclusive_jd"]
-        role_title = params.get("role_title", "[role title]")
-        location = params.get("location", "[location]")
-        seniority = params.get("seniority", "[seniority]")
-        responsibilities = params.get("responsibilities", "[responsibilities]")
-        requirements = params.get("requirements", "[requirements]")
-        benefits = params.get("benefits", "[benefits]")
-        brand_tone = params.get("brand_tone", "neutral")
-        return template.format(
-            role_title=role_title,
-            location=location,
-            seniority=seniority,
-            responsibilities=responsibilities,
-            requirements=requirements,
-            benefits=benefits,
-            brand_tone=brand_tone,
-        )
-
-    def handle_outreach_message(self, params: Dict[str, str]) -> str:
-        template = self.templates["outreach_message"]
-        candidate_name = params.get("candidate_name", "[candidate]")
-        role_title = params.get("role_title", "[role title]")
-        top_skills = params.get("top_skills", "[top skills]")
-        value_proposition = params.get("value_proposition", "[value proposition]")
-        jd_link = params.get("jd_link", "[JD link]")
-        tone = params.get("tone", "professional")
-        return template.format(
-            candidate_name=candidate_name,
-            role_title=role_title,
-            top_skills=top_skills,
-            value_proposition=value_proposition,
-            jd_link=jd_link,
-            tone=tone,
-        )
-
-    def handle_sourcing_plan(self, params: Dict[str, str]) -> str:
-        template = self.templates["sourcing_plan"]
-        role_title = params.get("role_title", "[role title]")
-        location = params.get("location", "[location]")
-        industry = params.get("industry", "[industry/domain]")
-        must_have = params.get("must_have", "[must‑have skills]")
-        return template.format(
-            role_title=role_title,
-            location=location,
-            industry=industry,
-            must_have=must_have,
-        )
-
-    def handle_interview_guide(self, params: Dict[str, str]) -> str:
-        template = self.templates["interview_guide"]
-        role_title = params.get("role_title", "[role title]")
-        seniority = params.get("seniority", "[seniority]")
-        competencies = params.get("competencies", "[competencies]")
-        stages = params.get("stages", "phone, technical, panel")
-        return template.format(
-            role_title=role_title,
-            seniority=seniority,
-            competencies=competencies,
-            stages=stages,
-        )
-
-    def handle_task_triage(self, params: Dict[str, str]) -> str:
-        template = self.templates["task_triage"]
-        open_roles = params.get("open_roles", "[open roles]")
-        candidate_stages = params.get("candidate_stages", "[candidate stages]")
-        pending_feedback = params.get("pending_feedback", "[pending feedback]")
-        upcoming_interviews = params.get("upcoming_interviews", "[upcoming interviews]")
-        return template.format(
-            open_roles=open_roles,
-            candidate_stages=candidate_stages,
-            pending_feedback=pending_feedback,
-            upcoming_interviews=upcoming_interviews,
-        )
-
-    def handle_offer_handover(self, params: Dict[str, str]) -> str:
-        template = self.templates["offer_handover"]
-        role_title = params.get("role_title", "[role title]")
-        candidate_name = params.get("candidate_name", "[candidate]")
-        start_date = params.get("start_date", "[start date]")
-        location = params.get("location", "[location]")
-        onboarding_sops = params.get("onboarding_sops", "[onboarding SOPs]")
-        return template.format(
-            role_title=role_title,
-            candidate_name=candidate_name,
-            start_date=start_date,
-            location=location,
-            onboarding_sops=onboarding_sops,
-        )
-
-    def handle_candidate_summary(self, params: Dict[str, str]) -> str:
-        template = self.templates["candidate_summary"]
-        candidate_cv = params.get("candidate_cv", "[candidate CV text]")
-        role_requirements = params.get("role_requirements", "[role requirements]")
-        return template.format(
-            candidate_cv=candidate_cv,
-            role_requirements=role_requirements,
-        )
-
-    def handle_market_insights(self, params: Dict[str, str]) -> str:
-        template = self.templates["market_insights"]
-        role_title = params.get("role_title", "[role title]")
-        location = params.get("location", "[location]")
-        seniority = params.get("seniority", "[seniority]")
-        return template.format(
-            role_title=role_title,
-            location=location,
-            seniority=seniority,
-        )
+        colon = message.find(":")
+        if colon < 0:
+            return {}
+        return dict(_param_re().findall(message, colon + 1))
@@ -14,22 +14,44 @@ calling a language model.
 import sys
 from .handlers import ScoutAgent
 
+# Commands (compared case-insensitively) that end the chat.
+_EXIT_CMDS = frozenset(("exit", "quit"))
+
 
 def run_chat() -> None:
     agent = ScoutAgent()
+    # Bound once; the loop below calls these for every message.
+    add_message = agent.add_message
+    route_message = agent.route_message
+    # Scripted transcripts piped into stdin are read with plain buffered
+    # reads; input() (line editing) is kept for an interactive terminal.
+    interactive = sys.stdin.isatty()
+    readline = sys.stdin.readline
+    write = sys.stdout.write
+    flush = sys.stdout.flush
     print("Welcome to the Scout agent demo. Type 'exit' to quit.")
     while True:
         try:
-            user_input = input("You: ").strip()
+            if interactive:
+                user_input = input("You: ").strip()
+            else:
+                # Flushes the prompt and the previous reply, as input()
+                # would, so a process driving us over a pipe sees them.
+                write("You: ")
+                flush()
+                line = readline()
+                if not line:
+                    raise EOFError
+                user_input = line.strip()
         except (EOFError, KeyboardInterrupt):
             print("\nExiting.")
             break
-        if user_input.lower() in {"exit", "quit"}:
+        if user_input.lower() in _EXIT_CMDS:
             print("Goodbye!")
             break
-        agent.add_message(role="user", content=user_input)
-        response = agent.route_message(user_input)
-        agent.add_message(role="assistant", content=response)
+        add_message(role="user", content=user_input)
+        response = route_message(user_input)
+        add_message(role="assistant", content=response)
         print(f"Scout: {response}\n")
 
 
@@ -14,7 +14,10 @@ on each function's parameters.
 
 """
 
-from typing import Dict
+import string
+import sys
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 # Templates for role refinement and Boolean search building.  The
 # template takes the role title, location, seniority and optional
@@ -149,20 +152,52 @@ MARKET_INSIGHTS_TEMPLATE: str = (
     "State the data source and the recency of the information."
 )
 
-def get_templates() -> Dict[str, str]:
+# Mapping of intent names to their templates.  The keys correspond to
+# the intent names in `handlers.py`.  The mapping is read-only so it can
+# be shared by every agent instead of being rebuilt for each one.
+TEMPLATES: Mapping[str, str] = MappingProxyType({
+    "role_refinement": ROLE_REFINEMENT_TEMPLATE,
+    "inclusive_jd": INCLUSIVE_JD_TEMPLATE,
+    "outreach_message": OUTREACH_MESSAGE_TEMPLATE,
+    "sourcing_plan": SOURCING_PLAN_TEMPLATE,
+    "interview_guide": INTERVIEW_GUIDE_TEMPLATE,
+    "task_triage": TASK_TRIAGE_TEMPLATE,
+    "offer_handover": OFFER_HANDOVER_TEMPLATE,
+    "candidate_summary": CANDIDATE_SUMMARY_TEMPLATE,
+    "market_insights": MARKET_INSIGHTS_TEMPLATE,
+})
+
+
+def get_templates() -> Mapping[str, str]:
     """Return a mapping of function names to their templates.
 
-    This helper is useful for loading all templates at once.  The keys
-    correspond to the handler names in `handlers.py`.
+    This helper is useful for loading all templates at once.  It
+    returns the shared, read-only `TEMPLATES` mapping.
+    """
+    return TEMPLATES
+
+
+# Every template pre-parsed into (literal text, field name) segments, so
+# rendering is a join over dictionary lookups instead of re-parsing the
+# format string on each call.  The templates only use plain `{field}`
+# placeholders, without conversions or format specs.  Field names are
+# interned so that looking them up in dicts keyed by string literals
+# (such as the defaults in `handlers.py`) hits on identity.
+_COMPILED: Dict[str, List[Tuple[str, Optional[str]]]] = {
+    name: [
+        (literal, sys.intern(field) if field is not None else None)
+        for literal, field, _, _ in string.Formatter().parse(template)
+    ]
+    for name, template in TEMPLATES.items()
+}
+
+
+def render(name: str, kwargs: Mapping[str, str]) -> str:
+    """Fill in the template `name` with the values in `kwargs`.
+
+    Equivalent to `TEMPLATES[name].format_map(kwargs)`.
     """
-    return {
-        "role_refinement": ROLE_REFINEMENT_TEMPLATE,
-        "inclusive_jd": INCLUSIVE_JD_TEMPLATE,
-        "outreach_message": OUTREACH_MESSAGE_TEMPLATE,
-        "sourcing_plan": SOURCING_PLAN_TEMPLATE,
-        "interview_guide": INTERVIEW_GUIDE_TEMPLATE,
-        "task_triage": TASK_TRIAGE_TEMPLATE,
-        "offer_handover": OFFER_HANDOVER_TEMPLATE,
-        "candidate_summary": CANDIDATE_SUMMARY_TEMPLATE,
-        "market_insights": MARKET_INSIGHTS_TEMPLATE,
-    }
+    return "".join(
+        [literal + str(kwargs[field]) if field is not None else literal
+         for literal, field in _COMPILED[name]]
+    )
@@ -0,0 +1,137 @@
+"""
+Tests for the concurrent entry points of the recruitment agents.
+
+Gemini is replaced by a fake model, so these run offline:
+
+    python -m unittest discover tests
+"""
+
+import asyncio
+import json
+import sys
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "agents" / "recruitement_agent"))
+
+import Inclusive_Job_Descriptor as jd  # noqa: E402
+import boolean_string_recommendation as bsr  # noqa: E402
+from _jd_cache import SmartCache  # noqa: E402
+
+JD_RESPONSE = json.dumps({
+    "status": "ok",
+    "missing_info": [],
+    "job_description": {
+        "full_text": "About the job",
+        "summary": "Summary.",
+        "responsibilities": ["Build things"],
+        "requirements": ["Python"],
+        "nice_to_have": [],
+        "benefits": [],
+        "inclusion_statement": "All welcome.",
+    },
+    "notes": "",
+})
+
+ROLE_RESPONSE = json.dumps({
+    "status": "ok",
+    "missing_info": [],
+    "refined_role": {
+        "main_title": "Software Engineer",
+        "related_titles": ["Developer"],
+        "core_skills": ["Python"],
+        "nice_to_have": [],
+        "seniority_level": "Mid",
+        "industry_focus": "tech",
+    },
+    "boolean_search": {"linkedin": "\"Software Engineer\"", "job_boards": "\"Software Engineer\""},
+    "notes": "",
+})
+
+
+class FakeModel:
+    """Stands in for GenerativeModel.
+
+    Like the SDK's grpc.aio client, the async method only works on the
+    first event loop that calls it.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.prompts = []
+        self._loop = None
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return types.SimpleNamespace(text=self.text)
+
+    async def generate_content_async(self, prompt):
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("Event loop is closed")
+        return self.generate_content(prompt)
+
+
+class GenerateInclusiveJDManyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.model = FakeModel(JD_RESPONSE)
+        patches = [
+            mock.patch.object(jd, "_CACHE", SmartCache()),
+            mock.patch.object(jd, "configure", lambda key: None),
+            mock.patch.object(jd, "_embed_roles", lambda inputs: [None] * len(inputs)),
+            mock.patch.object(jd._MODELS, "get", lambda key: self.model),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_second_call_in_same_process(self) -> None:
+        first = jd.generate_inclusive_jd_many([{"role": "Engineer"}], api_key="key")
+        second = jd.generate_inclusive_jd_many([{"role": "Designer"}], api_key="key")
+        self.assertEqual(first[0]["status"], "ok")
+        self.assertEqual(second[0]["status"], "ok")
+        self.assertEqual(len(self.model.prompts), 2)
+
+    def test_duplicates_generated_once_and_copied(self) -> None:
+        results = jd.generate_inclusive_jd_many(
+            [{"role": "Engineer"}, {"role": "Designer"}, {"role": "Engineer"}], api_key="key"
+        )
+        self.assertEqual(len(self.model.prompts), 2)
+        self.assertEqual(results[0], results[2])
+        self.assertIsNot(results[0], results[2])
+
+
+class RunRoleRefinementManyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.model = FakeModel(ROLE_RESPONSE)
+        patches = [
+            mock.patch.object(bsr, "_CACHE", SmartCache()),
+            mock.patch.object(bsr, "_get_model", lambda: self.model),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        bsr.run_role_refinement.cache_clear()
+        self.addCleanup(bsr.run_role_refinement.cache_clear)
+
+    def test_second_call_in_same_process(self) -> None:
+        first = bsr.run_role_refinement_many(["Software Engineer"])
+        second = bsr.run_role_refinement_many(["Data Scientist"])
+        self.assertEqual(first[0].status, "ok")
+        self.assertEqual(second[0].status, "ok")
+        self.assertEqual(len(self.model.prompts), 2)
+
+    def test_duplicates_refined_once_and_copied(self) -> None:
+        results = bsr.run_role_refinement_many(["A", "B", "a  "])
+        self.assertEqual(len(self.model.prompts), 2)
+        self.assertEqual(results[0], results[2])
+        self.assertIsNot(results[0], results[2])
+        self.assertIsNot(results[0].refined_role, results[2].refined_role)
+
+
+if __name__ == "__main__":
+    unittest.main()